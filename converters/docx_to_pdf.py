@@ -1,96 +1,575 @@
 import os
+import sys
 import platform
+import re
 import logging
 import tempfile
+import hashlib
+import shutil
+import threading
+import atexit
+import zipfile
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-def convert_docx_to_pdf(input_path: str, output_filename: str = None) -> str:
-    if output_filename:
-        output_path = os.path.join(os.path.dirname(input_path), output_filename)
+if platform.system() == "Windows":
+    # pythoncom calls CoInitializeEx(sys.coinit_flags) on the thread that first
+    # imports it, defaulting to a single-threaded apartment. That import happens
+    # on a worker thread in _WordPool, which needs the multithreaded apartment.
+    sys.coinit_flags = 0  # COINIT_MULTITHREADED
+
+
+# COM HRESULTs meaning the Word process behind a cached proxy has gone away
+_WORD_GONE_HRESULTS = frozenset({
+    -2147417848,  # RPC_E_DISCONNECTED
+    -2147023174,  # RPC_S_SERVER_UNAVAILABLE
+    -2147220995,  # CO_E_OBJNOTCONNECTED
+})
+
+
+class _WordPool:
+    """
+    Process-wide Word COM instance reused across conversions (Windows only).
+    Word is started lazily on first use and quit at interpreter exit.
+    Only one document is processed at a time per Word instance.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._word = None
+        self._thread_state = threading.local()
+        self._atexit_registered = False
+
+    def _init_thread(self):
+        import pythoncom
+        if not getattr(self._thread_state, "com_initialized", False):
+            # Multithreaded apartment so the cached Word proxy can be used
+            # from any worker thread, not just the one that created it
+            pythoncom.CoInitializeEx(pythoncom.COINIT_MULTITHREADED)
+            self._thread_state.com_initialized = True
+
+    def _get_word(self):
+        self._init_thread()
+        if self._word is None:
+            import win32com.client
+            logger.info("Starting Word COM instance...")
+            word = win32com.client.DispatchEx("Word.Application")
+            word.Visible = False
+            word.DisplayAlerts = 0
+            self._word = word
+            if not self._atexit_registered:
+                atexit.register(self._shutdown)
+                self._atexit_registered = True
+        return self._word
+
+    def _discard_word(self):
+        """Quit the cached Word instance (if it still answers) and forget it."""
+        if self._word is not None:
+            try:
+                self._word.Quit()
+            except Exception:
+                pass
+            self._word = None
+
+    @staticmethod
+    def _is_word_gone(error) -> bool:
+        import pywintypes
+        return isinstance(error, pywintypes.com_error) and error.hresult in _WORD_GONE_HRESULTS
+
+    def _shutdown(self):
+        with self._lock:
+            self._discard_word()
+            if getattr(self._thread_state, "com_initialized", False):
+                import pythoncom
+                pythoncom.CoUninitialize()
+                self._thread_state.com_initialized = False
+
+    def export_pdf(self, abs_input: str, abs_output: str):
+        with self._lock:
+            word = self._get_word()
+            try:
+                doc = word.Documents.Open(abs_input, ReadOnly=True)
+            except Exception as e:
+                # A corrupt or protected document fails here too; only restart
+                # when Word itself was closed behind our back
+                if not self._is_word_gone(e):
+                    raise
+                logger.warning(f"Cached Word instance unusable ({e}), restarting...")
+                self._discard_word()
+                word = self._get_word()
+                doc = word.Documents.Open(abs_input, ReadOnly=True)
+            try:
+                # 17 = wdExportFormatPDF; export is synchronous
+                doc.ExportAsFixedFormat(abs_output, 17, False, 0)
+            finally:
+                doc.Close(0)
+
+
+_word_pool = _WordPool()
+
+# Page template for mammoth output (a bare HTML fragment); `{body}` is replaced verbatim
+_HTML_TEMPLATE = """
+<!DOCTYPE html>
+<html>
+<head>
+    <meta charset="UTF-8">
+    <meta name="viewport" content="width=device-width, initial-scale=1.0">
+    <style>
+        @page {
+            size: A4;
+            margin: 2cm;
+        }
+        
+        body {
+            font-family: 'Nirmala UI', 'Mangal', 'Kokila', 'Segoe UI', 'Arial', 'Tahoma', 'SimSun', sans-serif;
+            font-size: 11pt;
+            line-height: 1.6;
+            color: #000;
+            max-width: 100%;
+        }
+        
+        /* Explicit Hindi/Devanagari support */
+        * {
+            font-family: 'Nirmala UI', 'Mangal', 'Kokila', 'Segoe UI', 'Arial', sans-serif;
+        }
+        
+        /* Support for RTL languages like Arabic/Urdu */
+        [dir="rtl"] {
+            direction: rtl;
+            text-align: right;
+            font-family: 'Tahoma', 'Arabic Typesetting', 'Traditional Arabic', sans-serif;
+        }
+        
+        /* Math support */
+        .math, math {
+            font-family: 'Cambria Math', 'STIX Two Math', 'Latin Modern Math', serif;
+        }
+        
+        /* Table styling */
+        table {
+            border-collapse: collapse;
+            width: 100%;
+            margin: 10px 0;
+        }
+        
+        table td, table th {
+            border: 1px solid #000;
+            padding: 8px;
+            text-align: left;
+            vertical-align: top;
+        }
+        
+        table th {
+            background-color: #4472C4;
+            color: white;
+            font-weight: bold;
+        }
+        
+        table tr:nth-child(even) {
+            background-color: #f2f2f2;
+        }
+        
+        h1, h2, h3, h4, h5, h6 {
+            color: #2c3e50;
+            margin-top: 1em;
+            margin-bottom: 0.5em;
+        }
+        
+        p {
+            margin: 0.5em 0;
+        }
+    </style>
+</head>
+<body>
+{body}
+</body>
+</html>
+"""
+
+# Extra CSS injected into pypandoc's standalone HTML, with Hindi font priority
+_CSS_INJECTION = """
+    <style>
+        * { font-family: 'Nirmala UI', 'Mangal', 'Kokila', 'Segoe UI', 'Arial', 'Tahoma', 'SimSun', sans-serif !important; }
+        body { font-family: 'Nirmala UI', 'Mangal', 'Kokila', 'Segoe UI', 'Arial', 'Tahoma', 'SimSun', sans-serif; }
+        table { border-collapse: collapse; width: 100%; margin: 10px 0; }
+        table td, table th { border: 1px solid #000; padding: 8px; }
+        table th { background-color: #4472C4; color: white; }
+        table tr:nth-child(even) { background-color: #f2f2f2; }
+        .math, math { font-family: 'Cambria Math', 'Latin Modern Math', serif; }
+    </style>
+</head>"""
+
+# Multi-language font options for the reportlab fallback (Windows only)
+_FONT_MAPPINGS = {
+    'hindi': [
+        ('C:/Windows/Fonts/Nirmala.ttf', 'NirmalaFont'),
+        ('C:/Windows/Fonts/mangal.ttf', 'MangalFont'),
+        ('C:/Windows/Fonts/NotoSansDevanagari-Regular.ttf', 'NotoDevanagariFont'),
+    ],
+    'arabic': [
+        ('C:/Windows/Fonts/tahoma.ttf', 'TahomaFont'),
+        ('C:/Windows/Fonts/TraditionalArabic.ttf', 'TraditionalArabicFont'),
+        ('C:/Windows/Fonts/ArabicTypesetting.ttf', 'ArabicTypesettingFont'),
+    ],
+    'chinese': [
+        ('C:/Windows/Fonts/simsun.ttc', 'SimSunFont'),
+        ('C:/Windows/Fonts/msyh.ttc', 'YaHeiFont'),
+        ('C:/Windows/Fonts/SimsunExtG.ttf', 'SimSunExtFont'),
+        ('C:/Windows/Fonts/simsunb.ttf', 'SimSunBFont'),
+    ],
+    'universal': [
+        ('C:/Windows/Fonts/arial.ttf', 'ArialFont'),
+        ('C:/Windows/Fonts/segoeui.ttf', 'SegoeFont'),
+        ('C:/Windows/Fonts/calibri.ttf', 'CalibriFont'),
+    ]
+}
+
+# Escapes XML special characters for reportlab Paragraph markup in a single pass
+_XML_TRANS = str.maketrans({'&': '&amp;', '<': '&lt;', '>': '&gt;'})
+
+# Script detection for the fallback's missing-font warnings
+_RE_DEVA = re.compile(r'[\u0900-\u097F]')
+_RE_ARAB = re.compile(r'[\u0600-\u06FF\u0750-\u077F]')
+_RE_CJK = re.compile(r'[\u4E00-\u9FFF\u3400-\u4DBF]')
+
+# WordprocessingML namespace, for reading document XML directly
+_W_NS = {'w': 'http://schemas.openxmlformats.org/wordprocessingml/2006/main'}
+_W = '{%s}' % _W_NS['w']
+
+# Script -> registered font name, filled once by _register_fonts_once()
+_REGISTERED_FONTS: dict[str, str] = {}
+_FONTS_INITIALIZED = False
+_FONTS_LOCK = threading.Lock()
+
+# reportlab fallback font and styles, built once alongside font registration
+_MAIN_FONT = 'Helvetica'
+_BODY_STYLE = None
+_HEADING_STYLE = None
+_ROW_TEXT_STYLE = None
+
+# Write buffer for PDF output handles (reportlab/xhtml2pdf emit many small chunks)
+PDF_WRITE_BUFFER = 1 << 20
+
+# DOCX files below this size without macros try the fast HTML engine before Word
+SMALL_DOCX_BYTES = 512 * 1024
+
+# Converted PDFs are cached by DOCX content hash so repeat uploads skip conversion
+CACHE_DIR = os.path.join(tempfile.gettempdir(), "docx_pdf_cache")
+CACHE_MAX_BYTES = 512 * 1024 * 1024
+# Bump when the conversion pipeline changes so stale PDFs are not served
+CACHE_ENGINE_VERSION = b"2"
+
+
+def _cache_key(input_path: str) -> str:
+    # Not a security boundary, just a fast content fingerprint
+    h = hashlib.blake2b(CACHE_ENGINE_VERSION, digest_size=16)
+    with open(input_path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def _evict_cache():
+    """Drop least recently used cache entries until under CACHE_MAX_BYTES."""
+    try:
+        entries = []
+        total = 0
+        with os.scandir(CACHE_DIR) as it:
+            for entry in it:
+                if entry.is_file() and entry.name.endswith(".pdf"):
+                    st = entry.stat()
+                    entries.append((st.st_mtime, st.st_size, entry.path))
+                    total += st.st_size
+        if total <= CACHE_MAX_BYTES:
+            return
+        for mtime, size, path in sorted(entries):
+            os.remove(path)
+            total -= size
+            if total <= CACHE_MAX_BYTES:
+                break
+    except OSError as e:
+        logger.warning(f"Cache eviction failed: {e}")
+
+
+def _store_in_cache(pdf_path: str, cached_path: str):
+    try:
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        tmp_path = f"{cached_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        shutil.copyfile(pdf_path, tmp_path)
+        os.replace(tmp_path, cached_path)
+        _evict_cache()
+    except OSError as e:
+        logger.warning(f"Could not cache converted PDF: {e}")
+
+
+def _paragraph_text(p_xml) -> str:
+    """Text of a w:p element, matching python-docx's Paragraph.text."""
+    # Only the paragraph's own runs (direct or inside a hyperlink); nested runs
+    # such as text-box content in mc:Choice/mc:Fallback are not paragraph text
+    parts = []
+    for node in p_xml:
+        if node.tag == _W + 'r':
+            runs = (node,)
+        elif node.tag == _W + 'hyperlink':
+            runs = node.iterfind('w:r', _W_NS)
+        else:
+            continue
+        for run in runs:
+            for child in run:
+                tag = child.tag
+                if tag == _W + 't':
+                    parts.append(child.text or '')
+                elif tag in (_W + 'tab', _W + 'ptab'):
+                    parts.append('\t')
+                elif tag == _W + 'br':
+                    # Page and column breaks are not line breaks
+                    if child.get(_W + 'type', 'textWrapping') == 'textWrapping':
+                        parts.append('\n')
+                elif tag == _W + 'cr':
+                    parts.append('\n')
+                elif tag == _W + 'noBreakHyphen':
+                    parts.append('-')
+    return ''.join(parts)
+
+
+def _cell_text(tc_xml) -> str:
+    """Text of a w:tc element, one line per paragraph like python-docx's _Cell.text."""
+    return '\n'.join(_paragraph_text(p_xml) for p_xml in tc_xml.iterfind('w:p', _W_NS))
+
+
+def _row_cell_texts(tr_xml) -> list:
+    """
+    Cell texts of a w:tr element, one entry per grid column. A horizontally merged
+    cell (w:gridSpan) is followed by '' for each extra column it covers, so later
+    cells stay under the right header.
+    """
+    texts = []
+    for tc_xml in tr_xml.iterfind('w:tc', _W_NS):
+        texts.append(_cell_text(tc_xml))
+        grid_span = tc_xml.find('w:tcPr/w:gridSpan', _W_NS)
+        if grid_span is not None:
+            texts.extend([''] * (int(grid_span.get(_W + 'val', '1')) - 1))
+    return texts
+
+
+def _register_fonts_once():
+    """
+    Register the Unicode fonts for the reportlab fallback on first use.
+    Populates _REGISTERED_FONTS with script -> font name, in priority order,
+    and builds the shared fallback paragraph styles.
+    """
+    global _FONTS_INITIALIZED, _MAIN_FONT
+    if _FONTS_INITIALIZED:
+        return
+    with _FONTS_LOCK:
+        if _FONTS_INITIALIZED:
+            return
+        
+        if platform.system() == "Windows":
+            from reportlab.pdfbase import pdfmetrics
+            from reportlab.pdfbase.ttfonts import TTFont
+            
+            # Try Hindi fonts
+            for font_path, font_name in _FONT_MAPPINGS['hindi']:
+                try:
+                    pdfmetrics.registerFont(TTFont(font_name, font_path))
+                    logger.info(f"✓ Registered Hindi font: {font_name}")
+                    _REGISTERED_FONTS['hindi'] = font_name
+                    break
+                except:
+                    pass
+            
+            # Try Arabic fonts
+            for font_path, font_name in _FONT_MAPPINGS['arabic']:
+                try:
+                    pdfmetrics.registerFont(TTFont(font_name, font_path))
+                    logger.info(f"✓ Registered Arabic/Urdu font: {font_name}")
+                    _REGISTERED_FONTS['arabic'] = font_name
+                    break
+                except:
+                    pass
+            
+            # Try Chinese fonts
+            for font_path, font_name in _FONT_MAPPINGS['chinese']:
+                try:
+                    # TTC files need special handling
+                    if font_path.endswith('.ttc'):
+                        continue  # Skip TTC files for now as they need subfontIndex
+                    pdfmetrics.registerFont(TTFont(font_name, font_path))
+                    logger.info(f"✓ Registered Chinese font: {font_name}")
+                    _REGISTERED_FONTS['chinese'] = font_name
+                    break
+                except:
+                    pass
+            
+            # Try universal fonts as fallback
+            if not _REGISTERED_FONTS:
+                for font_path, font_name in _FONT_MAPPINGS['universal']:
+                    try:
+                        pdfmetrics.registerFont(TTFont(font_name, font_path))
+                        logger.info(f"Registered universal font: {font_name}")
+                        _REGISTERED_FONTS['universal'] = font_name
+                        break
+                    except:
+                        pass
+            
+            # Log font support status
+            if _REGISTERED_FONTS:
+                logger.info(f"Font support: {', '.join(_REGISTERED_FONTS.keys())}")
+        
+        # First registered script font (hindi → arabic → chinese → universal)
+        _MAIN_FONT = next(iter(_REGISTERED_FONTS.values()), 'Helvetica')
+        _build_fallback_styles()
+        
+        _FONTS_INITIALIZED = True
+
+
+def _build_fallback_styles():
+    """Create the reportlab paragraph styles for the fallback, using _MAIN_FONT."""
+    global _BODY_STYLE, _HEADING_STYLE, _ROW_TEXT_STYLE
+    from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+    from reportlab.lib.units import inch
+    from reportlab.lib.enums import TA_LEFT
+    from reportlab.lib import colors
+    
+    styles = getSampleStyleSheet()
+    
+    # Create custom styles with Unicode font
+    _BODY_STYLE = ParagraphStyle(
+        'CustomBody',
+        parent=styles['BodyText'],
+        fontName=_MAIN_FONT,
+        fontSize=11,
+        leading=16,
+        alignment=TA_LEFT,
+        spaceAfter=6 + 0.15 * inch,  # includes the paragraph gap, so no Spacer flowables are needed
+        wordWrap='LTR'
+    )
+    
+    _HEADING_STYLE = ParagraphStyle(
+        'CustomHeading',
+        parent=styles['Heading1'],
+        fontName=_MAIN_FONT,
+        fontSize=16,
+        leading=22,
+        alignment=TA_LEFT,
+        spaceAfter=12 + 0.15 * inch,
+        spaceBefore=12,
+        textColor=colors.HexColor('#000000'),
+        bold=True
+    )
+    
+    # Table-as-text rows sit closer together than regular paragraphs
+    _ROW_TEXT_STYLE = ParagraphStyle('TableRowText', parent=_BODY_STYLE, spaceAfter=6 + 0.05 * inch)
+
+
+def convert_docx_to_pdf(input_path: str, output_filename: str = None, output_dir: str = None) -> str:
+    if not output_filename:
+        output_filename = os.path.splitext(os.path.basename(input_path))[0] + ".pdf"
+    output_path = os.path.join(output_dir or os.path.dirname(input_path), output_filename)
+    
+    # Reuse the PDF from an earlier conversion of identical DOCX content
+    key = _cache_key(input_path)
+    cached_path = os.path.join(CACHE_DIR, key + ".pdf")
+    if os.path.exists(cached_path):
+        try:
+            shutil.copyfile(cached_path, output_path)
+            os.utime(cached_path)  # mark as recently used for LRU eviction
+            logger.info(f"✓ Served from conversion cache: {key}")
+            return output_path
+        except OSError as e:
+            logger.warning(f"Conversion cache read failed: {e}")
+    
+    result_path, cacheable = _convert_docx_to_pdf_uncached(input_path, output_path)
+    if cacheable and result_path and os.path.exists(result_path) and os.path.getsize(result_path) > 0:
+        _store_in_cache(result_path, cached_path)
+    return result_path
+
+
+def _convert_docx_to_pdf_uncached(input_path: str, output_path: str) -> tuple:
+    """
+    Run the conversion engines in order. Returns (pdf_path, cacheable); the
+    reportlab last resort is not cacheable, since it may be a degraded rendering
+    produced while a better engine was only briefly unavailable.
+    """
+    if _prefer_html_engine(input_path):
+        # Small macro-free documents are usually done by the HTML engine before
+        # Word has even finished starting up
+        logger.info("Small document without macros, trying the HTML method first...")
+        engines = (_convert_via_html, _convert_with_word, _convert_with_pandoc_latex)
     else:
-        output_path = os.path.splitext(input_path)[0] + ".pdf"
+        engines = (_convert_with_word, _convert_with_pandoc_latex, _convert_via_html)
+    
+    for engine in engines:
+        result_path = engine(input_path, output_path)
+        if result_path:
+            return result_path, True
     
-    # Try using docx2pdf on Windows first (uses Microsoft Word COM - best quality & Unicode support)
+    return _convert_with_reportlab(input_path, output_path), False
+
+
+def _prefer_html_engine(input_path: str) -> bool:
+    """True for small DOCX files without a VBA project, which pandoc handles well."""
+    if os.path.getsize(input_path) >= SMALL_DOCX_BYTES:
+        return False
+    try:
+        with zipfile.ZipFile(input_path) as docx_zip:
+            return 'word/vbaProject.bin' not in docx_zip.namelist()
+    except zipfile.BadZipFile:
+        return False
+
+
+def _convert_with_word(input_path: str, output_path: str) -> str:
+    """Convert with Microsoft Word (Windows only). Returns None on failure."""
+    # Microsoft Word gives the best quality & Unicode support
     if platform.system() == "Windows":
+        abs_input = os.path.abspath(input_path)
+        abs_output = os.path.abspath(output_path)
+        
+        # Remove output file if it exists
+        if os.path.exists(abs_output):
+            os.remove(abs_output)
+        
         try:
-            from docx2pdf import convert
-            logger.info("Attempting conversion with docx2pdf (MS Word)...")
-            
-            abs_input = os.path.abspath(input_path)
-            abs_output = os.path.abspath(output_path)
-            
+            logger.info("Attempting conversion with pooled Word COM instance...")
             logger.info(f"Converting: {abs_input}")
             logger.info(f"Output to: {abs_output}")
             
-            # Remove output file if it exists
-            if os.path.exists(abs_output):
-                os.remove(abs_output)
-            
-            convert(abs_input, abs_output)
-            
-            # Wait a moment for file to be written
-            import time
-            time.sleep(0.5)
+            _word_pool.export_pdf(abs_input, abs_output)
             
             if os.path.exists(abs_output) and os.path.getsize(abs_output) > 0:
-                logger.info(f"✓ Successfully converted using docx2pdf (MS Word) - Size: {os.path.getsize(abs_output)} bytes")
+                logger.info(f"✓ Successfully converted using Word COM - Size: {os.path.getsize(abs_output)} bytes")
                 return abs_output
             else:
-                raise Exception("Output PDF was not created or is empty")
+                raise Exception("Word COM failed to create PDF")
                 
         except Exception as e:
-            logger.error(f"docx2pdf failed: {str(e)}")
+            logger.error(f"Word COM failed: {str(e)}")
             
-            # Try direct Word COM automation as fallback
+            # Try docx2pdf as fallback (starts its own Word instance)
             try:
-                logger.info("Trying direct Word COM automation...")
-                import win32com.client
-                import time
-                
-                word = win32com.client.Dispatch("Word.Application")
-                word.Visible = False
-                
-                abs_input = os.path.abspath(input_path)
-                abs_output = os.path.abspath(output_path)
-                
-                logger.info(f"Opening document: {abs_input}")
-                
-                # Remove output if exists
-                if os.path.exists(abs_output):
-                    os.remove(abs_output)
-                
-                # Open document
-                doc = word.Documents.Open(abs_input)
-                
-                # Save as PDF (FileFormat 17 = wdFormatPDF)
-                logger.info(f"Saving as PDF: {abs_output}")
-                doc.SaveAs(abs_output, FileFormat=17)
+                from docx2pdf import convert
+                logger.info("Attempting conversion with docx2pdf (MS Word)...")
                 
-                # Close document
-                doc.Close(False)
-                word.Quit()
-                
-                # Wait for file to be completely written
-                time.sleep(1)
+                convert(abs_input, abs_output)
                 
                 if os.path.exists(abs_output) and os.path.getsize(abs_output) > 0:
-                    logger.info(f"✓ Successfully converted using Word COM - Size: {os.path.getsize(abs_output)} bytes")
+                    logger.info(f"✓ Successfully converted using docx2pdf (MS Word) - Size: {os.path.getsize(abs_output)} bytes")
                     return abs_output
                 else:
-                    raise Exception("Word COM failed to create PDF")
+                    raise Exception("Output PDF was not created or is empty")
                     
             except Exception as e2:
-                logger.error(f"Word COM also failed: {str(e2)}")
-                try:
-                    # Cleanup Word in case of error
-                    word.Quit()
-                except:
-                    pass
+                logger.error(f"docx2pdf also failed: {str(e2)}")
                 logger.info("Falling back to alternative methods...")
     
-    # Try pypandoc direct PDF conversion first (best for math formulas and Unicode)
+    return None
+
+
+def _convert_with_pandoc_latex(input_path: str, output_path: str) -> str:
+    """Convert with pypandoc + XeLaTeX. Returns None on failure."""
+    # pypandoc direct PDF conversion (best for math formulas and Unicode)
     try:
         import pypandoc
         logger.info("Attempting direct DOCX to PDF conversion with pypandoc...")
@@ -122,7 +601,12 @@ def convert_docx_to_pdf(input_path: str, output_filename: str = None) -> str:
     except Exception as e:
         logger.warning(f"pypandoc not available or failed: {e}")
     
-    # Try pypandoc for HTML conversion (better for math and Unicode)
+    return None
+
+
+def _convert_via_html(input_path: str, output_path: str) -> str:
+    """Convert DOCX → HTML (pandoc/mammoth) → PDF (wkhtmltopdf/xhtml2pdf). Returns None on failure."""
+    # pypandoc for HTML conversion (better for math and Unicode)
     try:
         logger.info("Converting DOCX → HTML → PDF with pypandoc...")
         
@@ -133,10 +617,9 @@ def convert_docx_to_pdf(input_path: str, output_filename: str = None) -> str:
         
         try:
             # Convert DOCX to HTML with MathML support
-            pypandoc.convert_file(
+            pypandoc_html = pypandoc.convert_file(
                 input_path,
                 'html',
-                outputfile=html_temp_path,
                 extra_args=[
                     '--mathml',  # Convert math to MathML
                     '--standalone',  # Create complete HTML
@@ -144,12 +627,12 @@ def convert_docx_to_pdf(input_path: str, output_filename: str = None) -> str:
                 ]
             )
             logger.info("✓ Converted DOCX to HTML using pypandoc")
-            html_content = None  # Will read from file
+            html_content = None
             
         except Exception as e:
             logger.warning(f"pypandoc HTML conversion failed: {e}, trying mammoth...")
             
-            # Fallback to mammoth
+            # Fallback to mammoth; zipfile reads the members straight from the file
             import mammoth
             with open(input_path, "rb") as docx_file:
                 result = mammoth.convert_to_html(
@@ -166,107 +649,14 @@ def convert_docx_to_pdf(input_path: str, output_filename: str = None) -> str:
         # Step 2: Enhance HTML with proper CSS for Unicode and math support
         if html_content:
             # mammoth output - need to wrap in HTML structure
-            enhanced_html = f"""
-<!DOCTYPE html>
-<html>
-<head>
-    <meta charset="UTF-8">
-    <meta name="viewport" content="width=device-width, initial-scale=1.0">
-    <style>
-        @page {{
-            size: A4;
-            margin: 2cm;
-        }}
-        
-        body {{
-            font-family: 'Nirmala UI', 'Mangal', 'Kokila', 'Segoe UI', 'Arial', 'Tahoma', 'SimSun', sans-serif;
-            font-size: 11pt;
-            line-height: 1.6;
-            color: #000;
-            max-width: 100%;
-        }}
-        
-        /* Explicit Hindi/Devanagari support */
-        * {{
-            font-family: 'Nirmala UI', 'Mangal', 'Kokila', 'Segoe UI', 'Arial', sans-serif;
-        }}
-        
-        /* Support for RTL languages like Arabic/Urdu */
-        [dir="rtl"] {{
-            direction: rtl;
-            text-align: right;
-            font-family: 'Tahoma', 'Arabic Typesetting', 'Traditional Arabic', sans-serif;
-        }}
-        
-        /* Math support */
-        .math, math {{
-            font-family: 'Cambria Math', 'STIX Two Math', 'Latin Modern Math', serif;
-        }}
-        
-        /* Table styling */
-        table {{
-            border-collapse: collapse;
-            width: 100%;
-            margin: 10px 0;
-        }}
-        
-        table td, table th {{
-            border: 1px solid #000;
-            padding: 8px;
-            text-align: left;
-            vertical-align: top;
-        }}
-        
-        table th {{
-            background-color: #4472C4;
-            color: white;
-            font-weight: bold;
-        }}
-        
-        table tr:nth-child(even) {{
-            background-color: #f2f2f2;
-        }}
-        
-        h1, h2, h3, h4, h5, h6 {{
-            color: #2c3e50;
-            margin-top: 1em;
-            margin-bottom: 0.5em;
-        }}
-        
-        p {{
-            margin: 0.5em 0;
-        }}
-    </style>
-</head>
-<body>
-{html_content}
-</body>
-</html>
-"""
-            with open(html_temp_path, 'w', encoding='utf-8') as f:
-                f.write(enhanced_html)
+            enhanced_html = _HTML_TEMPLATE.replace('{body}', html_content)
         else:
-            # pypandoc output - already complete HTML, just enhance CSS
-            with open(html_temp_path, 'r', encoding='utf-8') as f:
-                pypandoc_html = f.read()
-            
-            # Add additional CSS for better rendering with Hindi font priority
-            css_injection = """
-    <style>
-        * { font-family: 'Nirmala UI', 'Mangal', 'Kokila', 'Segoe UI', 'Arial', 'Tahoma', 'SimSun', sans-serif !important; }
-        body { font-family: 'Nirmala UI', 'Mangal', 'Kokila', 'Segoe UI', 'Arial', 'Tahoma', 'SimSun', sans-serif; }
-        table { border-collapse: collapse; width: 100%; margin: 10px 0; }
-        table td, table th { border: 1px solid #000; padding: 8px; }
-        table th { background-color: #4472C4; color: white; }
-        table tr:nth-child(even) { background-color: #f2f2f2; }
-        .math, math { font-family: 'Cambria Math', 'Latin Modern Math', serif; }
-    </style>
-</head>"""
-            
-            pypandoc_html = pypandoc_html.replace('</head>', css_injection)
-            
-            with open(html_temp_path, 'w', encoding='utf-8') as f:
-                f.write(pypandoc_html)
+            # pypandoc output - already complete HTML, just add CSS with Hindi font priority
+            enhanced_html = pypandoc_html.replace('</head>', _CSS_INJECTION)
+        
+        # Written once; wkhtmltopdf needs a file, xhtml2pdf reuses the string
+        with open(html_temp_path, 'w', encoding='utf-8') as f:
+            f.write(enhanced_html)
         
         logger.info(f"✓ HTML ready: {html_temp_path}")
         
@@ -322,12 +712,9 @@ def convert_docx_to_pdf(input_path: str, output_filename: str = None) -> str:
                 from xhtml2pdf import pisa
                 logger.info("Converting HTML to PDF with xhtml2pdf...")
                 
-                with open(html_temp_path, 'r', encoding='utf-8') as html_file:
-                    html_string = html_file.read()
-                
-                with open(output_path, 'wb') as pdf_file:
+                with open(output_path, 'wb', buffering=PDF_WRITE_BUFFER) as pdf_file:
                     pisa_status = pisa.CreatePDF(
-                        html_string,
+                        enhanced_html,
                         dest=pdf_file,
                         encoding='utf-8'
                     )
@@ -351,167 +738,60 @@ def convert_docx_to_pdf(input_path: str, output_filename: str = None) -> str:
     except Exception as e:
         logger.error(f"HTML conversion method failed: {e}")
     
+    return None
+
+
+def _convert_with_reportlab(input_path: str, output_path: str) -> str:
+    """Last-resort conversion with python-docx + reportlab; always produces a PDF."""
     # Fallback: Manual conversion using python-docx + reportlab with improved Unicode and table support
     logger.info("Using fallback method: python-docx + reportlab...")
     from docx import Document
     from reportlab.lib.pagesizes import letter, A4
     from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle
-    from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+    from reportlab.lib.styles import ParagraphStyle
     from reportlab.lib.units import inch
-    from reportlab.lib.enums import TA_LEFT, TA_CENTER
     from reportlab.lib import colors
-    from reportlab.pdfbase import pdfmetrics
-    from reportlab.pdfbase.ttfonts import TTFont
     
     doc = Document(input_path)
-    pdf = SimpleDocTemplate(output_path, pagesize=letter)
-    
-    # Register Unicode fonts - try multiple options including multi-language support
-    font_registered = False
-    hindi_font_registered = False
-    arabic_font_registered = False
-    chinese_font_registered = False
     
-    if platform.system() == "Windows":
-        # Multi-language font options
-        font_mappings = {
-            'hindi': [
-                ('C:/Windows/Fonts/Nirmala.ttf', 'NirmalaFont'),
-                ('C:/Windows/Fonts/mangal.ttf', 'MangalFont'),
-                ('C:/Windows/Fonts/NotoSansDevanagari-Regular.ttf', 'NotoDevanagariFont'),
-            ],
-            'arabic': [
-                ('C:/Windows/Fonts/tahoma.ttf', 'TahomaFont'),
-                ('C:/Windows/Fonts/TraditionalArabic.ttf', 'TraditionalArabicFont'),
-                ('C:/Windows/Fonts/ArabicTypesetting.ttf', 'ArabicTypesettingFont'),
-            ],
-            'chinese': [
-                ('C:/Windows/Fonts/simsun.ttc', 'SimSunFont'),
-                ('C:/Windows/Fonts/msyh.ttc', 'YaHeiFont'),
-                ('C:/Windows/Fonts/SimsunExtG.ttf', 'SimSunExtFont'),
-                ('C:/Windows/Fonts/simsunb.ttf', 'SimSunBFont'),
-            ],
-            'universal': [
-                ('C:/Windows/Fonts/arial.ttf', 'ArialFont'),
-                ('C:/Windows/Fonts/segoeui.ttf', 'SegoeFont'),
-                ('C:/Windows/Fonts/calibri.ttf', 'CalibriFont'),
-            ]
-        }
-        
-        registered_fonts = {}
-        
-        # Try Hindi fonts
-        for font_path, font_name in font_mappings['hindi']:
-            try:
-                pdfmetrics.registerFont(TTFont(font_name, font_path))
-                logger.info(f"✓ Registered Hindi font: {font_name}")
-                registered_fonts['hindi'] = font_name
-                hindi_font_registered = True
-                if not font_registered:
-                    main_font = font_name
-                    font_registered = True
-                break
-            except:
-                pass
-        
-        # Try Arabic fonts
-        for font_path, font_name in font_mappings['arabic']:
-            try:
-                pdfmetrics.registerFont(TTFont(font_name, font_path))
-                logger.info(f"✓ Registered Arabic/Urdu font: {font_name}")
-                registered_fonts['arabic'] = font_name
-                arabic_font_registered = True
-                if not font_registered:
-                    main_font = font_name
-                    font_registered = True
-                break
-            except:
-                pass
-        
-        # Try Chinese fonts
-        for font_path, font_name in font_mappings['chinese']:
-            try:
-                # TTC files need special handling
-                if font_path.endswith('.ttc'):
-                    continue  # Skip TTC files for now as they need subfontIndex
-                pdfmetrics.registerFont(TTFont(font_name, font_path))
-                logger.info(f"✓ Registered Chinese font: {font_name}")
-                registered_fonts['chinese'] = font_name
-                chinese_font_registered = True
-                if not font_registered:
-                    main_font = font_name
-                    font_registered = True
-                break
-            except:
-                pass
-        
-        # Try universal fonts as fallback
-        if not font_registered:
-            for font_path, font_name in font_mappings['universal']:
-                try:
-                    pdfmetrics.registerFont(TTFont(font_name, font_path))
-                    logger.info(f"Registered universal font: {font_name}")
-                    registered_fonts['universal'] = font_name
-                    main_font = font_name
-                    font_registered = True
-                    break
-                except:
-                    pass
-        
-        # Log font support status
-        if registered_fonts:
-            logger.info(f"Font support: {', '.join(registered_fonts.keys())}")
+    # Unicode fonts and paragraph styles are set up once per process
+    _register_fonts_once()
+    hindi_font_registered = 'hindi' in _REGISTERED_FONTS
+    arabic_font_registered = 'arabic' in _REGISTERED_FONTS
+    chinese_font_registered = 'chinese' in _REGISTERED_FONTS
     
-    if not font_registered:
-        main_font = 'Helvetica'
+    main_font = _MAIN_FONT
+    if main_font == 'Helvetica':
         logger.warning("Using default Helvetica font - Unicode characters may not display correctly")
     
-    styles = getSampleStyleSheet()
-    
-    # Create custom styles with Unicode font
-    body_style = ParagraphStyle(
-        'CustomBody',
-        parent=styles['BodyText'],
-        fontName=main_font,
-        fontSize=11,
-        leading=16,
-        alignment=TA_LEFT,
-        spaceAfter=6,
-        wordWrap='LTR'
-    )
-    
-    heading_style = ParagraphStyle(
-        'CustomHeading',
-        parent=styles['Heading1'],
-        fontName=main_font,
-        fontSize=16,
-        leading=22,
-        alignment=TA_LEFT,
-        spaceAfter=12,
-        spaceBefore=12,
-        textColor=colors.HexColor('#000000'),
-        bold=True
-    )
+    body_style = _BODY_STYLE
+    heading_style = _HEADING_STYLE
+    row_text_style = _ROW_TEXT_STYLE
     
     story = []
+    # Loop invariants hoisted out of the paragraph/table loops below
+    story_append = story.append
+    
+    # Paragraphs and table cells are read straight from the document XML rather than
+    # through python-docx's proxy objects, which are rebuilt on every property access
+    style_names = {s.style_id: s.name for s in doc.styles}
     
     # Add paragraphs
-    for para_idx, para in enumerate(doc.paragraphs):
-        text_content = para.text.strip()
+    for para_idx, p_xml in enumerate(doc.element.body.iterfind('w:p', _W_NS)):
+        text_content = _paragraph_text(p_xml).strip()
         if text_content:
             # Determine style based on formatting
-            if para.style.name.startswith('Heading'):
-                style = heading_style
-            else:
-                style = body_style
+            style_id = p_xml.find('w:pPr/w:pStyle', _W_NS)
+            style_name = style_names.get(style_id.get(_W + 'val'), '') if style_id is not None else ''
+            style = heading_style if style_name.startswith('Heading') else body_style
             
             # Escape special XML characters but preserve Unicode
-            text = text_content.replace('&', '&amp;').replace('<', '&lt;').replace('>', '&gt;')
+            text = text_content.translate(_XML_TRANS)
             
             # Detect script type in the text
-            has_devanagari = any('\u0900' <= char <= '\u097F' for char in text_content)  # Hindi
-            has_arabic = any('\u0600' <= char <= '\u06FF' or '\u0750' <= char <= '\u077F' for char in text_content)  # Arabic/Urdu
-            has_chinese = any('\u4E00' <= char <= '\u9FFF' or '\u3400' <= char <= '\u4DBF' for char in text_content)  # Chinese
+            has_devanagari = _RE_DEVA.search(text_content) is not None  # Hindi
+            has_arabic = _RE_ARAB.search(text_content) is not None  # Arabic/Urdu
+            has_chinese = _RE_CJK.search(text_content) is not None  # Chinese
             
             # Warn if script detected but font not available
             if has_devanagari and not hindi_font_registered:
@@ -522,9 +802,7 @@ def convert_docx_to_pdf(input_path: str, output_filename: str = None) -> str:
                 logger.warning(f"Paragraph {para_idx} contains Chinese text but no Chinese font available")
             
             try:
-                p = Paragraph(text, style)
-                story.append(p)
-                story.append(Spacer(1, 0.15 * inch))
+                story_append(Paragraph(text, style))
             except Exception as e:
                 logger.warning(f"Could not add paragraph {para_idx}: {e}")
                 # Try encoding the text differently
@@ -537,18 +815,14 @@ def convert_docx_to_pdf(input_path: str, output_filename: str = None) -> str:
                         fontSize=10,
                         leading=14
                     )
-                    p = Paragraph(text, simple_style)
-                    story.append(p)
-                    story.append(Spacer(1, 0.15 * inch))
+                    story_append(Paragraph(text, simple_style))
                 except Exception as e2:
                     logger.error(f"Failed to add paragraph even with simple style: {e2}")
                     # Last resort: add as plain ASCII
                     safe_text = text_content.encode('ascii', 'ignore').decode('ascii')
                     if safe_text:
                         try:
-                            p = Paragraph(safe_text + " [Some characters could not be displayed]", body_style)
-                            story.append(p)
-                            story.append(Spacer(1, 0.15 * inch))
+                            story_append(Paragraph(safe_text + " [Some characters could not be displayed]", body_style))
                         except:
                             pass
     
@@ -556,37 +830,39 @@ def convert_docx_to_pdf(input_path: str, output_filename: str = None) -> str:
     for table_idx, table in enumerate(doc.tables):
         try:
             table_data = []
-            max_cols = 0
+            
+            rows_cells = [
+                _row_cell_texts(tr) for tr in table._element.iterfind('w:tr', _W_NS)
+            ]
             
             # First pass: determine max columns
-            for row in table.rows:
-                max_cols = max(max_cols, len(row.cells))
+            max_cols = max((len(cells) for cells in rows_cells), default=0)
             
             # Second pass: build table data
-            for row_idx, row in enumerate(table.rows):
+            for row_idx, cells in enumerate(rows_cells):
                 row_data = []
+                row_data_append = row_data.append
+                num_cells = len(cells)
                 
                 for col_idx in range(max_cols):
-                    if col_idx < len(row.cells):
-                        cell = row.cells[col_idx]
-                        cell_text = cell.text.strip()
+                    if col_idx < num_cells:
+                        cell_text = cells[col_idx].strip()
                         
                         if cell_text:
                             # Escape XML characters
-                            cell_text = cell_text.replace('&', '&amp;').replace('<', '&lt;').replace('>', '&gt;')
+                            cell_text = cell_text.translate(_XML_TRANS)
                             
                             try:
                                 # Try creating paragraph with Unicode text
-                                cell_para = Paragraph(cell_text, body_style)
-                                row_data.append(cell_para)
+                                row_data_append(Paragraph(cell_text, body_style))
                             except Exception as e:
                                 logger.debug(f"Paragraph creation failed for cell [{row_idx},{col_idx}]: {e}")
                                 # Fallback to plain text
-                                row_data.append(str(cell_text))
+                                row_data_append(str(cell_text))
                         else:
-                            row_data.append('')
+                            row_data_append('')
                     else:
-                        row_data.append('')
+                        row_data_append('')
                 
                 table_data.append(row_data)
             
@@ -618,9 +894,9 @@ def convert_docx_to_pdf(input_path: str, output_filename: str = None) -> str:
                 
                 t.setStyle(TableStyle(table_style))
                 
-                story.append(Spacer(1, 0.2 * inch))
-                story.append(t)
-                story.append(Spacer(1, 0.3 * inch))
+                t.spaceBefore = 0.2 * inch
+                t.spaceAfter = 0.3 * inch
+                story_append(t)
                 logger.info(f"✓ Added table {table_idx + 1} with {len(table_data)} rows and {max_cols} columns")
             else:
                 logger.warning(f"Table {table_idx + 1} has no data")
@@ -629,37 +905,111 @@ def convert_docx_to_pdf(input_path: str, output_filename: str = None) -> str:
             logger.error(f"Could not add table {table_idx + 1}: {e}")
             # Fallback: add table as formatted text
             try:
-                story.append(Spacer(1, 0.1 * inch))
-                story.append(Paragraph(f"<b>Table {table_idx + 1}:</b>", heading_style))
+                story_append(Spacer(1, 0.1 * inch))
+                story_append(Paragraph(f"<b>Table {table_idx + 1}:</b>", heading_style))
                 
                 for row_idx, row in enumerate(table.rows):
-                    row_texts = [cell.text.strip() for cell in row.cells if cell.text.strip()]
+                    row_texts = [text for text in (cell.text.strip() for cell in row.cells) if text]
                     if row_texts:
                         row_text = ' | '.join(row_texts)
-                        row_text = row_text.replace('&', '&amp;').replace('<', '&lt;').replace('>', '&gt;')
+                        row_text = row_text.translate(_XML_TRANS)
                         try:
-                            p = Paragraph(row_text, body_style)
-                            story.append(p)
-                            story.append(Spacer(1, 0.05 * inch))
+                            story_append(Paragraph(row_text, row_text_style))
                         except:
                             logger.warning(f"Could not add row {row_idx} as text")
                 
-                story.append(Spacer(1, 0.2 * inch))
+                story_append(Spacer(1, 0.2 * inch))
             except Exception as e2:
                 logger.error(f"Fallback text rendering also failed: {e2}")
     
-    # Build the PDF
-    if story:
+    # Build the PDF through a large write buffer so it reaches disk in a few big writes
+    with open(output_path, 'wb', buffering=PDF_WRITE_BUFFER) as pdf_file:
+        pdf = SimpleDocTemplate(pdf_file, pagesize=letter)
+        if story:
+            try:
+                pdf.build(story)
+                logger.info("✓ Successfully created PDF using reportlab fallback")
+            except Exception as e:
+                logger.error(f"Failed to build PDF: {e}")
+                # Create minimal PDF, discarding anything the failed build wrote
+                pdf_file.seek(0)
+                pdf_file.truncate()
+                pdf.build([Paragraph("Error: Could not render document content", body_style)])
+        else:
+            # If no content, create a blank PDF
+            pdf.build([Paragraph("No content found in document", body_style)])
+            logger.warning("No content found in document")
+    
+    return output_path
+
+
+def _convert_docx_with_own_word(input_path: str) -> str:
+    """
+    Process-pool worker: convert one DOCX with a Word instance private to
+    this process. Falls back to the regular conversion ladder on failure.
+    """
+    abs_input = os.path.abspath(input_path)
+    abs_output = os.path.splitext(abs_input)[0] + ".pdf"
+    
+    try:
+        import pythoncom
+        import win32com.client
+        
+        # Same apartment the pythoncom import already set up (see sys.coinit_flags)
+        pythoncom.CoInitializeEx(pythoncom.COINIT_MULTITHREADED)
+        word = None
         try:
-            pdf.build(story)
-            logger.info("✓ Successfully created PDF using reportlab fallback")
-        except Exception as e:
-            logger.error(f"Failed to build PDF: {e}")
-            # Create minimal PDF
-            pdf.build([Paragraph("Error: Could not render document content", body_style)])
+            word = win32com.client.DispatchEx("word.application")
+            word.Visible = False
+            doc = word.Documents.Open(abs_input, ReadOnly=True)
+            try:
+                doc.ExportAsFixedFormat(abs_output, 17, False, 0)
+            finally:
+                doc.Close(0)
+        finally:
+            if word is not None:
+                word.Quit()
+            pythoncom.CoUninitialize()
+        
+        if os.path.exists(abs_output) and os.path.getsize(abs_output) > 0:
+            return abs_output
+        raise Exception("Word COM failed to create PDF")
+    except Exception as e:
+        logger.error(f"Batch Word COM failed for {abs_input}: {str(e)}")
+        return convert_docx_to_pdf(input_path)
+
+
+def convert_docx_to_pdf_batch(paths, max_workers: int = None) -> list:
+    """
+    Convert many DOCX files in parallel. Each PDF is written next to its
+    input. Returns output paths in input order (None for failed files).
+    """
+    paths = list(paths)
+    if not paths:
+        return []
+    
+    if max_workers is None:
+        # Word tops out at a few concurrent instances per machine
+        max_workers = min(os.cpu_count() or 1, len(paths), 8)
+    
+    if platform.system() == "Windows":
+        # One Word instance per process sidesteps the single-instance bottleneck
+        executor = ProcessPoolExecutor(max_workers=max_workers)
+        worker = _convert_docx_with_own_word
     else:
-        # If no content, create a blank PDF
-        pdf.build([Paragraph("No content found in document", body_style)])
-        logger.warning("No content found in document")
+        # pandoc/wkhtmltopdf run as external processes, threads are enough
+        executor = ThreadPoolExecutor(max_workers=max_workers)
+        worker = convert_docx_to_pdf
     
-    return output_path
+    results = []
+    with executor:
+        futures = [executor.submit(worker, path) for path in paths]
+        for path, future in zip(paths, futures):
+            try:
+                results.append(future.result())
+            except Exception as e:
+                logger.error(f"Failed to convert {path}: {str(e)}")
+                results.append(None)
+    
+    logger.info(f"Batch converted {sum(r is not None for r in results)}/{len(paths)} DOCX files")
+    return results
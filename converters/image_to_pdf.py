@@ -1,13 +1,40 @@
 from PIL import Image
 import os
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Modes the PIL PDF writer can embed without conversion
+PDF_NATIVE_MODES = ('RGB', 'L', 'CMYK')
+# Formats img2pdf can embed losslessly without decoding the pixels
+PASSTHROUGH_FORMATS = ('JPEG', 'JPEG2000')
+PDF_RESOLUTION = 100.0
 
 def convert_image_to_pdf(input_path: str, output_filename: str = None) -> str:
-    image = Image.open(input_path)
-    if image.mode != "RGB":
-        image = image.convert("RGB")
     if output_filename:
         output_path = os.path.join(os.path.dirname(input_path), output_filename)
     else:
         output_path = os.path.splitext(input_path)[0] + ".pdf"
-    image.save(output_path, "PDF", resolution=100.0)
+    
+    image = Image.open(input_path)  # lazy: only the header is read here
+    
+    # JPEGs go into the PDF byte-for-byte as a DCTDecode stream
+    if image.format in PASSTHROUGH_FORMATS:
+        try:
+            import img2pdf
+            layout = img2pdf.get_fixed_dpi_layout_fun((PDF_RESOLUTION, PDF_RESOLUTION))
+            with open(input_path, "rb") as src:
+                pdf_bytes = img2pdf.convert(src.read(), layout_fun=layout)
+            with open(output_path, "wb") as f:
+                f.write(pdf_bytes)
+            image.close()
+            return output_path
+        except Exception as e:
+            logger.warning(f"img2pdf passthrough failed, re-encoding with PIL: {e}")
+    
+    # For JPEGs let libjpeg decode straight to the target mode (no-op otherwise)
+    image.draft('RGB', image.size)
+    if image.mode not in PDF_NATIVE_MODES:
+        image = image.convert("RGB")
+    image.save(output_path, "PDF", resolution=PDF_RESOLUTION)
     return output_path
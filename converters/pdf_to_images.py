@@ -1,35 +1,120 @@
-from pdf2image import convert_from_path
-from PIL import Image
+from pdf2image import convert_from_path, pdfinfo_from_path
+from concurrent.futures import ProcessPoolExecutor
+from collections import deque
 import os
+import queue
+import threading
 import zipfile
 
+# Pages rendered per pdftoppm call; small chunks keep the render/zip pipeline flowing
+PAGES_PER_CHUNK = 8
+# Rendered pages allowed to wait for the zip writer before rendering pauses
+PAGE_QUEUE_SIZE = 8
+
+
+def _render_page_range(pdf_path, output_dir, image_format, dpi, first_page, last_page):
+    # pdftoppm encodes PNG/JPEG itself and writes straight to disk, so the
+    # pages never go through a PIL decode/re-encode round-trip
+    return convert_from_path(
+        pdf_path,
+        dpi=dpi,
+        first_page=first_page,
+        last_page=last_page,
+        thread_count=1,
+        fmt=image_format,
+        jpegopt={"quality": 85, "optimize": False},
+        output_folder=output_dir,
+        output_file=f"page_{first_page:05d}_",
+        paths_only=True,
+    )
+
+
+def _produce_pages(executor, jobs, max_in_flight, page_queue, stop):
+    """
+    Submit render jobs keeping at most `max_in_flight` running, and feed the
+    rendered page paths to `page_queue` in page order, followed by None.
+    Blocks (and so stops submitting) while the queue is full. Gives up, cancelling
+    jobs not yet started, once `stop` is set by a consumer that is no longer reading.
+    """
+    def put(item):
+        while not stop.is_set():
+            try:
+                page_queue.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                pass
+        return False
+    
+    pending = deque()
+    try:
+        jobs = iter(jobs)
+        for job in jobs:
+            pending.append(executor.submit(_render_page_range, *job))
+            if len(pending) >= max_in_flight:
+                break
+        while pending:
+            rendered_paths = pending.popleft().result()
+            next_job = next(jobs, None)
+            if next_job is not None:
+                pending.append(executor.submit(_render_page_range, *next_job))
+            for rendered_path in rendered_paths:
+                if not put(rendered_path):
+                    return
+        put(None)
+    except Exception as e:
+        put(e)
+    finally:
+        for future in pending:
+            future.cancel()
+
+
 def pdf_to_images_zip(pdf_path, output_dir, image_format='png', dpi=200, cleanup=True):
     os.makedirs(output_dir, exist_ok=True)
 
-    # Convert all pages to images
-    pages = convert_from_path(pdf_path, dpi=dpi)
+    ext = image_format.lower()
+    page_count = pdfinfo_from_path(pdf_path)["Pages"]
+    jobs = [
+        (pdf_path, output_dir, ext, dpi, lo, min(lo + PAGES_PER_CHUNK - 1, page_count))
+        for lo in range(1, page_count + 1, PAGES_PER_CHUNK)
+    ]
+    workers = max(1, min(os.cpu_count() or 1, len(jobs)))
+
+    # Create ZIP file containing all images (page-wise order).
+    # PNG/JPEG are already compressed, so they are stored without deflate.
+    # Pages are rendered in parallel by a background producer while this
+    # thread zips them, so rendering and zip I/O overlap.
+    zip_filename = os.path.join(output_dir, "converted_images.zip")
+    page_queue = queue.Queue(maxsize=PAGE_QUEUE_SIZE)
+    stop = threading.Event()
     image_paths = []
+    with zipfile.ZipFile(zip_filename, 'w', zipfile.ZIP_STORED, allowZip64=True) as zipf, \
+            ProcessPoolExecutor(max_workers=workers) as executor:
+        producer = threading.Thread(
+            target=_produce_pages, args=(executor, jobs, workers, page_queue, stop), daemon=True
+        )
+        producer.start()
 
-    for i, page in enumerate(pages):
-        img_name = f"page_{i + 1:03d}.{image_format.lower()}"  # e.g., page_001.png
-        img_path = os.path.join(output_dir, img_name)
-        page.save(img_path, image_format.upper())
-        image_paths.append(img_path)
+        try:
+            while (rendered_path := page_queue.get()) is not None:
+                if isinstance(rendered_path, Exception):
+                    raise rendered_path
+                img_name = f"page_{len(image_paths) + 1:03d}.{ext}"  # e.g., page_001.png
+                img_path = os.path.join(output_dir, img_name)
+                os.replace(rendered_path, img_path)
+                zipf.write(img_path, arcname=img_name)
+                image_paths.append(img_path)
 
-    # Create ZIP file containing all images (page-wise order)
-    zip_filename = os.path.join(output_dir, "converted_images.zip")
-    with zipfile.ZipFile(zip_filename, 'w', zipfile.ZIP_DEFLATED) as zipf:
-        for img_path in image_paths:
-            arcname = os.path.basename(img_path)  # keep only filename in ZIP
-            zipf.write(img_path, arcname=arcname)
-
-    # Optionally clean up image files after zipping
-    if cleanup:
-        for img_path in image_paths:
-            try:
-                os.remove(img_path)
-            except Exception as e:
-                print(f"Warning: could not delete {img_path}: {e}")
+                # Clean up each image as soon as it is zipped, keeping disk usage bounded
+                if cleanup:
+                    try:
+                        os.remove(img_path)
+                    except Exception as e:
+                        print(f"Warning: could not delete {img_path}: {e}")
+        finally:
+            # On failure, release a producer blocked on the full queue before the
+            # executor shuts down, so its thread does not outlive this call
+            stop.set()
+            producer.join()
 
     return {
         "zip_file": zip_filename,
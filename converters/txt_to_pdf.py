@@ -5,42 +5,70 @@ from reportlab.pdfbase.ttfonts import TTFont
 import os
 import platform
 
-def convert_txt_to_pdf(input_path: str, output_filename: str = None) -> str:
-    if output_filename:
-        output_path = os.path.join(os.path.dirname(input_path), output_filename)
-    else:
-        output_path = os.path.splitext(input_path)[0] + ".pdf"
-    
-    # Register Unicode fonts
+def _register_unicode_font() -> str:
+    """Register the Unicode font once per process; returns the font name to use."""
+    if 'UniFont' in pdfmetrics.getRegisteredFontNames():
+        return 'UniFont'
     try:
         if platform.system() == "Windows":
             pdfmetrics.registerFont(TTFont('UniFont', 'C:/Windows/Fonts/arial.ttf'))
         else:
             pdfmetrics.registerFont(TTFont('UniFont', '/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf'))
-        font_name = 'UniFont'
+        return 'UniFont'
     except:
-        font_name = 'Helvetica'
-    
-    c = canvas.Canvas(output_path, pagesize=letter)
-    c.setFont(font_name, 11)
+        return 'Helvetica'
+
+_FONT_NAME = _register_unicode_font()
+
+# Page layout, in points
+LEFT_MARGIN = 50
+TOP_Y = 750
+BOTTOM_Y = 50
+LINE_HEIGHT = 15
+FONT_SIZE = 11
+LINES_PER_PAGE = (TOP_Y - BOTTOM_Y) // LINE_HEIGHT + 1
+
+def convert_txt_to_pdf(input_path: str, output_filename: str = None, output_dir: str = None) -> str:
+    if not output_filename:
+        output_filename = os.path.splitext(os.path.basename(input_path))[0] + ".pdf"
+    output_path = os.path.join(output_dir or os.path.dirname(input_path), output_filename)
     
+    # Iterate the file lazily so only one line is held in memory at a time
     with open(input_path, "r", encoding="utf-8", errors="ignore") as f:
-        text = f.readlines()
+        _draw_lines(f, output_path)
+    return output_path
 
-    x, y = 50, 750
-    for line in text:
-        if y < 50:
+def convert_text_to_pdf(text_file, output_path: str) -> str:
+    """Like convert_txt_to_pdf, for an already open text stream (e.g. a ZIP member)."""
+    # Lines are drawn as they are read, so only one is held in memory at a time
+    _draw_lines(text_file, output_path)
+    return output_path
+
+def _draw_lines(lines, output_path: str):
+    font_name = _FONT_NAME
+    
+    c = canvas.Canvas(output_path, pagesize=letter)
+    
+    # One text object per page keeps the content stream to a single BT ... ET
+    # block per page instead of one per line
+    def new_page_text():
+        text = c.beginText(LEFT_MARGIN, TOP_Y)
+        text.setFont(font_name, FONT_SIZE)
+        text.setLeading(LINE_HEIGHT)
+        return text
+    
+    text = new_page_text()
+    lines_on_page = 0
+    for line in lines:
+        if lines_on_page == LINES_PER_PAGE:
+            c.drawText(text)
             c.showPage()
-            c.setFont(font_name, 11)
-            y = 750
+            text = new_page_text()
+            lines_on_page = 0
         try:
-            c.drawString(x, y, line.strip())
-        except:
-            # If drawing fails, try to encode properly
-            try:
-                c.drawString(x, y, line.strip().encode('utf-8').decode('utf-8'))
-            except:
-                c.drawString(x, y, "Unable to render line")
-        y -= 15
+            text.textLine(line.rstrip('\r\n'))
+        except Exception:
+            text.textLine("Unable to render line")
+        lines_on_page += 1
+    c.drawText(text)
     c.save()
-    return output_path
@@ -1,102 +1,296 @@
-import zipfile, os, logging
+import zipfile, os, io, tempfile, shutil, logging
+from concurrent.futures import ThreadPoolExecutor
+from collections import deque
 from PIL import Image
 from reportlab.lib.pagesizes import letter, A4
 from reportlab.pdfgen import canvas
+from reportlab.lib.utils import ImageReader
 from .docx_to_pdf import convert_docx_to_pdf
-from .txt_to_pdf import convert_txt_to_pdf
+from .txt_to_pdf import convert_text_to_pdf
 
 logger = logging.getLogger(__name__)
 
-def handle_zip_file(input_path: str) -> str:
+# Documents get one PDF each; images are merged into a single PDF
+_DOC_EXTS = frozenset({'.txt', '.docx'})
+_IMG_EXTS = frozenset({'.jpg', '.jpeg', '.png', '.bmp', '.gif', '.tiff'})
+# Images reportlab can embed byte-for-byte when given a file path
+_JPEG_EXTS = frozenset({'.jpg', '.jpeg'})
+
+# Limits checked against the ZIP's central directory before extraction
+MAX_UNCOMPRESSED_BYTES = 1 << 30  # 1 GiB across all convertible members
+MAX_COMPRESSION_RATIO = 100  # per member; legit documents/images rarely exceed this
+RATIO_CHECK_MIN_BYTES = 1 << 20  # small members may compress well without being a threat
+
+# Name of the single PDF all images in the archive are merged into
+MERGED_IMAGES_PDF = "images_merged.pdf"
+
+
+class ZipTooLargeError(ValueError):
+    """Raised when an uploaded ZIP would expand beyond the allowed limits."""
+
+def _check_zip_limits(members):
+    """Raise ZipTooLargeError if the members would expand beyond the configured limits."""
+    total = 0
+    for info in members:
+        total += info.file_size
+        if total > MAX_UNCOMPRESSED_BYTES:
+            raise ZipTooLargeError(
+                f"ZIP contents exceed {MAX_UNCOMPRESSED_BYTES // (1 << 20)} MB uncompressed"
+            )
+        if (info.file_size > RATIO_CHECK_MIN_BYTES
+                and info.file_size > MAX_COMPRESSION_RATIO * max(info.compress_size, 1)):
+            raise ZipTooLargeError(
+                f"Suspicious compression ratio for {info.filename} "
+                f"({info.file_size} bytes from {info.compress_size})"
+            )
+
+def handle_zip_file(input_path: str) -> tuple:
     """
     Extract ZIP and convert contents:
     - TXT/DOCX files → separate PDFs
     - All images → single merged PDF (in order)
-    Returns path to ZIP file containing all PDFs
+    Returns (path to ZIP file containing all PDFs, temp dir holding it);
+    the caller removes the temp dir once the ZIP has been sent
+    """
+    logger.info(f"Reading ZIP: {input_path}")
+    with zipfile.ZipFile(input_path, 'r') as zip_ref:
+        # Only the members we can convert are ever decompressed
+        members = []
+        for info in zip_ref.infolist():
+            if info.is_dir():
+                continue
+            ext = os.path.splitext(info.filename)[1].lower()
+            if ext in _DOC_EXTS or ext in _IMG_EXTS:
+                members.append(info)
+        
+        # Reject oversized archives and zip bombs from the central directory,
+        # before anything is written to disk
+        _check_zip_limits(members)
+        
+        # Create a unique temp directory for this conversion
+        temp_dir = tempfile.mkdtemp(prefix="convert_zip_")
+        try:
+            output_zip_path = _convert_members(zip_ref, members, temp_dir)
+        except BaseException:
+            # The caller only learns temp_dir on success, so clean it up here
+            shutil.rmtree(temp_dir, ignore_errors=True)
+            raise
+    
+    return output_zip_path, temp_dir
+
+
+def _convert_members(zip_ref, members, temp_dir):
+    """
+    Convert the given members of an open ZIP to PDFs under temp_dir and
+    bundle them into one ZIP. Returns the path of that ZIP.
     """
-    import tempfile, shutil
-    # Create a unique temp directory for this conversion
-    temp_dir = tempfile.mkdtemp(prefix="convert_zip_")
     extract_dir = os.path.join(temp_dir, "extracted")
     pdf_output_dir = os.path.join(temp_dir, "pdfs")
     os.makedirs(extract_dir, exist_ok=True)
     os.makedirs(pdf_output_dir, exist_ok=True)
     
-    logger.info(f"Extracting ZIP: {input_path}")
-    with zipfile.ZipFile(input_path, 'r') as zip_ref:
-        zip_ref.extractall(extract_dir)
-    
-    # Collect files by type
-    document_files = []
+    # Single pass over the archive: each document is handed to a worker as soon
+    # as it is reached, so conversion overlaps with decompressing the rest.
+    # TXT members are streamed from the archive by their worker and non-JPEG
+    # images are decoded from memory during the merge. DOCX members are written
+    # to disk for the converters, and JPEGs so reportlab can embed them by path
+    # without decoding them.
+    document_count = 0
+    # Output names taken so far (lowercased for case-insensitive filesystems);
+    # members from different folders may share a basename
+    used_names = {MERGED_IMAGES_PDF}
     image_files = []
-    
-    for root, dirs, files in os.walk(extract_dir):
-        for filename in files:
-            file_path = os.path.join(root, filename)
+    image_files_append = image_files.append
+    max_workers = min(8, os.cpu_count() or 1)
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = []
+        futures_append = futures.append
+        for info in members:
+            filename = os.path.basename(info.filename)
             ext = os.path.splitext(filename)[1].lower()
             
-            if ext in ['.txt', '.docx']:
-                document_files.append((filename, file_path, ext))
-            elif ext in ['.jpg', '.jpeg', '.png', '.bmp', '.gif', '.tiff']:
-                image_files.append((filename, file_path))
-    
-    logger.info(f"Found {len(document_files)} documents and {len(image_files)} images")
-    
-    # Convert each document to separate PDF
-    for filename, file_path, ext in document_files:
-        try:
-            base_name = os.path.splitext(filename)[0]
-            output_filename = f"{base_name}.pdf"
-            
-            if ext == '.docx':
-                logger.info(f"Converting DOCX: {filename}")
-                pdf_path = convert_docx_to_pdf(file_path, output_filename)
-            elif ext == '.txt':
-                logger.info(f"Converting TXT: {filename}")
-                pdf_path = convert_txt_to_pdf(file_path, output_filename)
-            
-            # Move PDF to output directory
+            if ext == '.txt':
+                output_filename = _unique_pdf_name(filename, used_names)
+                futures_append(executor.submit(_convert_text, zip_ref, info, pdf_output_dir, output_filename))
+                document_count += 1
+            elif ext == '.docx':
+                file_path = zip_ref.extract(info, extract_dir)
+                output_filename = _unique_pdf_name(filename, used_names)
+                futures_append(executor.submit(_convert_docx, filename, file_path, pdf_output_dir, output_filename))
+                document_count += 1
+            elif ext in _JPEG_EXTS:
+                image_files_append((filename, zip_ref.extract(info, extract_dir)))
+            else:
+                image_files_append((filename, info))
+        
+        logger.info(f"Found {document_count} documents and {len(image_files)} images")
+        
+        for future in futures:
+            output_filename, pdf_path = future.result()
             if pdf_path and os.path.exists(pdf_path):
-                dest_path = os.path.join(pdf_output_dir, output_filename)
-                if os.path.abspath(pdf_path) != os.path.abspath(dest_path):
-                    os.rename(pdf_path, dest_path)
                 logger.info(f"Created PDF: {output_filename}")
-        except Exception as e:
-            logger.error(f"Failed to convert {filename}: {str(e)}")
     
     # Merge all images into single PDF
     if image_files:
         try:
             logger.info(f"Merging {len(image_files)} images into single PDF")
-            images_pdf_path = os.path.join(pdf_output_dir, "images_merged.pdf")
-            merge_images_to_pdf(image_files, images_pdf_path)
+            images_pdf_path = os.path.join(pdf_output_dir, MERGED_IMAGES_PDF)
+            merge_images_to_pdf(
+                image_files, images_pdf_path,
+                open_source=lambda source: source if isinstance(source, str) else io.BytesIO(zip_ref.read(source)),
+                scratch_dir=extract_dir,
+            )
             logger.info("Images merged successfully")
         except Exception as e:
             logger.error(f"Failed to merge images: {str(e)}")
     
-    # Create output ZIP containing all PDFs
+    # Create output ZIP containing all PDFs (stored: PDF streams are already compressed)
     output_zip_path = os.path.join(temp_dir, "converted_files.zip")
-    with zipfile.ZipFile(output_zip_path, 'w', zipfile.ZIP_DEFLATED) as zip_out:
-        for filename in os.listdir(pdf_output_dir):
-            file_path = os.path.join(pdf_output_dir, filename)
-            zip_out.write(file_path, filename)
+    with zipfile.ZipFile(output_zip_path, 'w', zipfile.ZIP_STORED, allowZip64=True) as zip_out, \
+            os.scandir(pdf_output_dir) as it:
+        for entry in it:
+            zip_out.write(entry.path, entry.name)
     
     logger.info(f"Created output ZIP: {output_zip_path}")
-    # Optionally, clean up temp_dir after returning zip (if you want to delete temp files)
-    # shutil.rmtree(temp_dir)
     return output_zip_path
 
+def _unique_pdf_name(filename, used_names):
+    """
+    '<base>.pdf' for filename, or '<base>_2.pdf', '<base>_3.pdf', ... if that
+    name is already in used_names. The chosen name is added to used_names.
+    """
+    base_name = os.path.splitext(filename)[0]
+    output_filename = f"{base_name}.pdf"
+    n = 1
+    while output_filename.lower() in used_names:
+        n += 1
+        output_filename = f"{base_name}_{n}.pdf"
+    used_names.add(output_filename.lower())
+    return output_filename
+
+
+def _convert_docx(filename, file_path, output_dir, output_filename):
+    """
+    Convert an extracted DOCX member to output_filename in output_dir.
+    Returns (output_filename, pdf_path); pdf_path is None if conversion failed.
+    """
+    pdf_path = None
+    try:
+        logger.info(f"Converting DOCX: {filename}")
+        pdf_path = convert_docx_to_pdf(file_path, output_filename, output_dir=output_dir)
+    except Exception as e:
+        logger.error(f"Failed to convert {filename}: {str(e)}")
+    return output_filename, pdf_path
+
+
+def _convert_text(zip_ref, info, output_dir, output_filename):
+    """
+    Convert a TXT member of zip_ref to output_filename in output_dir, decoding
+    it line by line as it is decompressed.
+    Returns (output_filename, pdf_path); pdf_path is None if conversion failed.
+    """
+    filename = os.path.basename(info.filename)
+    pdf_path = None
+    try:
+        logger.info(f"Converting TXT: {filename}")
+        with zip_ref.open(info) as member, \
+                io.TextIOWrapper(member, encoding='utf-8', errors='ignore') as text_file:
+            pdf_path = convert_text_to_pdf(text_file, os.path.join(output_dir, output_filename))
+    except Exception as e:
+        logger.error(f"Failed to convert {filename}: {str(e)}")
+    return output_filename, pdf_path
+
+
+def _scratch_jpeg_path(scratch_dir):
+    """Create an empty uniquely named .jpg file in scratch_dir and return its path."""
+    fd, path = tempfile.mkstemp(suffix='.jpg', dir=scratch_dir)
+    os.close(fd)
+    return path
+
+
+def _prepare_image(image_path, page_width, page_height, target_size, layout_cache, scratch_dir=None):
+    """
+    Open, decode and place one image (a path or an in-memory file) for merge_images_to_pdf.
+    Returns (image_source, x, y, width, height, img, scratch_path); the caller closes
+    img and, once drawn, deletes scratch_path (if not None).
+    Runs on worker threads - Pillow releases the GIL while decoding.
+    """
+    img = Image.open(image_path)
+    
+    # Let libjpeg decode large JPEGs at 1/2, 1/4 or 1/8 scale (no-op for other formats)
+    original_size = img.size
+    img.draft('RGB', target_size)
+    downscaled = img.size != original_size
+    
+    # reportlab embeds JPEG files byte-for-byte when given a path (an ImageReader
+    # would be fully decoded on the canvas thread to fingerprint it); everything
+    # else is decoded here, off the canvas thread, and handed over as an ImageReader
+    scratch_path = None
+    if not downscaled and img.mode in ('RGB', 'L') and img.format == 'JPEG':
+        if isinstance(image_path, str):
+            image_source = image_path
+        else:
+            scratch_path = _scratch_jpeg_path(scratch_dir)
+            with open(scratch_path, 'wb') as f:
+                f.write(image_path.getbuffer())
+            image_source = scratch_path
+    else:
+        source_format = img.format
+        if img.mode not in ('RGB', 'L'):
+            img = img.convert('RGB')
+        if source_format == 'JPEG':
+            # Photos would otherwise be embedded as raw Flate pixels; re-encode them
+            # compactly to a scratch file, which reportlab then embeds as-is
+            scratch_path = _scratch_jpeg_path(scratch_dir)
+            img.save(scratch_path, "JPEG", quality=85, optimize=True, progressive=True, subsampling=2)
+            image_source = scratch_path
+        else:
+            img.load()
+            image_source = ImageReader(img)
+    
+    # Images from one camera/scanner usually share a size, so placement is computed once per size
+    layout = layout_cache.get(img.size)
+    if layout is None:
+        img_width, img_height = img.size
+        
+        # Calculate scaling to fit page while maintaining aspect ratio
+        width_ratio = page_width / img_width
+        height_ratio = page_height / img_height
+        scale = min(width_ratio, height_ratio)
+        
+        new_width = img_width * scale
+        new_height = img_height * scale
+        
+        # Center image on page
+        x = (page_width - new_width) / 2
+        y = (page_height - new_height) / 2
+        
+        layout = layout_cache[img.size] = (x, y, new_width, new_height)
+    x, y, new_width, new_height = layout
+    
+    return image_source, x, y, new_width, new_height, img, scratch_path
+
+
+def _prepare_loaded_image(open_source, source, *args):
+    """Load an image source on the worker thread, then _prepare_image it."""
+    return _prepare_image(open_source(source), *args)
+
 
-def merge_images_to_pdf(image_files, output_path):
+def merge_images_to_pdf(image_files, output_path, open_source=None, scratch_dir=None):
     """
     Merge multiple images into a single PDF file, preserving order.
     Each image is placed on a separate page, scaled to fit the page.
+    image_files holds (filename, source) pairs; open_source, if given, turns a
+    source into something Image.open accepts and is called on the worker threads.
+    Re-encoded JPEGs are staged in scratch_dir (default: the system temp dir).
     """
     # Keep images in the order they appear in the ZIP (don't sort)
-    # image_files is already in ZIP order from os.walk
+    # image_files is already in archive order
+    if open_source is None:
+        open_source = lambda source: source
     
     # Open first image to get dimensions and create canvas
-    first_img = Image.open(image_files[0][1])
+    first_img = Image.open(open_source(image_files[0][1]))
     img_width, img_height = first_img.size
     first_img.close()
     
@@ -108,45 +302,46 @@ def merge_images_to_pdf(image_files, output_path):
     
     c = canvas.Canvas(output_path, pagesize=pagesize)
     page_width, page_height = pagesize
+    # Page size in pixels at 96 DPI; no point decoding images larger than this
+    target_size = (int(page_width * 96 / 72), int(page_height * 96 / 72))
     
-    for filename, image_path in image_files:
-        try:
-            img = Image.open(image_path)
-            
-            # Convert to RGB if necessary
-            if img.mode not in ('RGB', 'L'):
-                img = img.convert('RGB')
-            
-            img_width, img_height = img.size
-            
-            # Calculate scaling to fit page while maintaining aspect ratio
-            width_ratio = page_width / img_width
-            height_ratio = page_height / img_height
-            scale = min(width_ratio, height_ratio)
-            
-            new_width = img_width * scale
-            new_height = img_height * scale
-            
-            # Center image on page
-            x = (page_width - new_width) / 2
-            y = (page_height - new_height) / 2
-            
-            # Save temp file for reportlab (it needs file path)
-            temp_img_path = image_path + "_temp.jpg"
-            img.save(temp_img_path, "JPEG", quality=95)
-            img.close()
-            
-            # Draw image on canvas
-            c.drawImage(temp_img_path, x, y, new_width, new_height)
-            c.showPage()
-            
-            # Clean up temp file
-            if os.path.exists(temp_img_path):
-                os.remove(temp_img_path)
+    # Images are decoded in parallel but drawn in order by this thread, the only
+    # one touching the canvas. At most `window` decoded images are held at once.
+    max_workers = os.cpu_count() or 1
+    window = 2 * max_workers
+    layout_cache = {}  # (width, height) -> (x, y, width, height) on the page
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        pending = deque()
+        entries = iter(image_files)
+        
+        def submit_next():
+            entry = next(entries, None)
+            if entry is not None:
+                filename, source = entry
+                future = executor.submit(_prepare_loaded_image, open_source, source, page_width, page_height, target_size, layout_cache, scratch_dir)
+                pending.append((filename, future))
+        
+        for _ in range(window):
+            submit_next()
+        
+        while pending:
+            filename, future = pending.popleft()
+            submit_next()
+            try:
+                image_source, x, y, new_width, new_height, img, scratch_path = future.result()
                 
-        except Exception as e:
-            logger.error(f"Failed to add image {filename} to PDF: {str(e)}")
-            continue
+                # Draw image on canvas
+                try:
+                    c.drawImage(image_source, x, y, new_width, new_height)
+                    c.showPage()
+                finally:
+                    img.close()
+                    if scratch_path is not None:
+                        os.remove(scratch_path)
+                    
+            except Exception as e:
+                logger.error(f"Failed to add image {filename} to PDF: {str(e)}")
+                continue
     
     c.save()
     logger.info(f"Saved merged PDF with {len(image_files)} images")
@@ -1,18 +1,16 @@
 from fastapi import FastAPI, UploadFile, File, HTTPException
-from fastapi.responses import FileResponse
-import os, shutil, uuid, logging
+from starlette.background import BackgroundTask
+from utils.responses import SendfileResponse
+import os, shutil, uuid, logging, asyncio, platform
+from concurrent.futures import ThreadPoolExecutor
+import aiofiles
 from converters.docx_to_pdf import convert_docx_to_pdf
 from converters.txt_to_pdf import convert_txt_to_pdf
 from converters.image_to_pdf import convert_image_to_pdf
-from converters.zip_handler import handle_zip_file
+from converters.zip_handler import handle_zip_file, ZipTooLargeError
 from converters.pdf_to_images import pdf_to_images_zip
 from utils.file_utils import get_file_extension, create_temp_dir
 
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-)
 logger = logging.getLogger(__name__)
 
 app = FastAPI(title="File Converter Hub API")
@@ -20,36 +18,114 @@ app = FastAPI(title="File Converter Hub API")
 UPLOAD_DIR = "temp_uploads"
 os.makedirs(UPLOAD_DIR, exist_ok=True)
 
+UPLOAD_CHUNK_SIZE = 4 << 20  # 4 MiB
+# Only Linux sendfile() accepts a regular file as the destination (macOS needs a socket)
+SENDFILE_TO_FILE = platform.system() == "Linux" and hasattr(os, "sendfile")
+
+# Converters are blocking (CPU work and external processes), so they run here
+# instead of on the event loop
+EXECUTOR = ThreadPoolExecutor(max_workers=(os.cpu_count() or 1) * 2)
+
+
+def _sendfile_copy(src, path: str):
+    """Copy a disk-backed file object to path in the kernel with os.sendfile."""
+    src_fd = src.fileno()
+    size = os.fstat(src_fd).st_size
+    with open(path, "wb") as dst:
+        offset = 0
+        while offset < size:
+            sent = os.sendfile(dst.fileno(), src_fd, offset, size - offset)
+            if sent == 0:
+                break
+            offset += sent
+
+
+async def save_upload(file: UploadFile, path: str):
+    """Stream an upload to disk without blocking the event loop."""
+    # Large uploads are spooled to a real temp file; copy those without
+    # pulling the bytes through Python. (fileno() would force small,
+    # in-memory uploads to roll over to disk, so check first.)
+    if SENDFILE_TO_FILE and getattr(file.file, "_rolled", False):
+        try:
+            await run_blocking(_sendfile_copy, file.file, path)
+            return
+        except OSError as e:
+            # e.g. a filesystem without sendfile support; copy through Python instead
+            logger.warning(f"sendfile upload copy failed, falling back: {e}")
+            await file.seek(0)
+    
+    async with aiofiles.open(path, "wb") as f:
+        while chunk := await file.read(UPLOAD_CHUNK_SIZE):
+            await f.write(chunk)
+
+
+async def run_blocking(func, *args):
+    """Run a blocking converter on the shared executor."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(EXECUTOR, func, *args)
+
+
+def _single_pdf(convert):
+    """Adapt a converter that returns a PDF path to the HANDLERS signature."""
+    def handler(input_path, output_filename):
+        output_path = convert(input_path, output_filename)
+        return output_path, output_path
+    return handler
+
+
+def _remove_path(path: str):
+    """Delete a conversion result, either a single file or a whole temp dir."""
+    if os.path.isdir(path):
+        shutil.rmtree(path, ignore_errors=True)
+    else:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+
+# Extension -> handler(input_path, output_filename) returning (output_path, cleanup_path);
+# cleanup_path (the PDF itself, or the ZIP's temp dir) is removed after the response is sent
+HANDLERS = {
+    ".docx": _single_pdf(convert_docx_to_pdf),
+    ".txt": _single_pdf(convert_txt_to_pdf),
+    ".jpg": _single_pdf(convert_image_to_pdf),
+    ".jpeg": _single_pdf(convert_image_to_pdf),
+    ".png": _single_pdf(convert_image_to_pdf),
+    ".zip": lambda input_path, output_filename: handle_zip_file(input_path),
+}
+
+
+@app.post("/convert")
 @app.post("/convert-to-pdf")
 async def convert_file(file: UploadFile = File(...)):
     ext = get_file_extension(file.filename)
+    handler = HANDLERS.get(ext)
+    if handler is None:
+        raise HTTPException(status_code=400, detail=f"Unsupported file type: {ext}")
+    
     file_id = str(uuid.uuid4())
     input_path = os.path.join(UPLOAD_DIR, f"{file_id}_{file.filename}")
     
-    # Generate output filename based on original filename
+    # Generate output filename based on original filename; on disk it carries the
+    # request's file_id so concurrent uploads of the same name don't collide
     original_name = os.path.splitext(file.filename)[0]
     output_filename = f"{original_name}.pdf"
+    file_prefix = f"{file_id}_"
     
     logger.info(f"Converting {file.filename} (type: {ext})")
 
     # Save uploaded file temporarily
-    with open(input_path, "wb") as f:
-        shutil.copyfileobj(file.file, f)
+    await save_upload(file, input_path)
     
     logger.info(f"Saved input file: {input_path} ({os.path.getsize(input_path)} bytes)")
 
+    # Where single-file converters write; removed if the conversion fails part-way
+    expected_output_path = os.path.join(os.path.dirname(input_path), file_prefix + output_filename)
+    cleanup_path = None
     try:
-        if ext == ".docx":
-            output_path = convert_docx_to_pdf(input_path, output_filename)
-        elif ext == ".txt":
-            output_path = convert_txt_to_pdf(input_path, output_filename)
-        elif ext in [".jpg", ".jpeg", ".png"]:
-            output_path = convert_image_to_pdf(input_path, output_filename)
-        elif ext == ".zip":
-            output_path = handle_zip_file(input_path)
-            output_filename = os.path.basename(output_path)
-        else:
-            raise HTTPException(status_code=400, detail=f"Unsupported file type: {ext}")
+        output_path, cleanup_path = await run_blocking(handler, input_path, file_prefix + output_filename)
+        output_filename = os.path.basename(output_path).removeprefix(file_prefix)
         
         if not os.path.exists(output_path):
             logger.error(f"Conversion failed: output file not created")
@@ -61,9 +137,15 @@ async def convert_file(file: UploadFile = File(...)):
         if output_size < 1000:
             logger.warning(f"Output file is suspiciously small: {output_size} bytes")
 
-        return FileResponse(output_path, filename=output_filename)
+        # Results are only kept until the response has been sent
+        return SendfileResponse(output_path, filename=output_filename,
+                                background=BackgroundTask(_remove_path, cleanup_path))
+    except ZipTooLargeError as e:
+        logger.warning(f"Rejected ZIP upload: {str(e)}")
+        raise HTTPException(status_code=413, detail=str(e))
     except Exception as e:
         logger.error(f"Conversion error: {str(e)}", exc_info=True)
+        _remove_path(cleanup_path or expected_output_path)
         raise HTTPException(status_code=500, detail=f"Conversion failed: {str(e)}")
     finally:
         # Clean up temporary input file
@@ -89,14 +171,24 @@ async def pdf_to_images_endpoint(
     output_dir = os.path.join(UPLOAD_DIR, f"{file_id}_images")
 
     # Save uploaded PDF
-    with open(input_path, "wb") as f:
-        shutil.copyfileobj(file.file, f)
+    await save_upload(file, input_path)
 
     logger.info(f"Converting PDF to images: {input_path} as {fmt}")
-    result = pdf_to_images_zip(input_path, output_dir, image_format=fmt)
+    result = await run_blocking(pdf_to_images_zip, input_path, output_dir, fmt)
     zip_path = result["zip_file"]
 
     if not os.path.exists(zip_path):
         raise HTTPException(status_code=500, detail="Image conversion failed.")
 
-    return FileResponse(zip_path, filename="converted_images.zip", media_type="application/zip")
+    return SendfileResponse(zip_path, filename="converted_images.zip", media_type="application/zip")
+
+
+if __name__ == "__main__":
+    import uvicorn
+    
+    # Configure logging only when run directly; under uvicorn/gunicorn the server owns it
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    )
+    uvicorn.run(app)
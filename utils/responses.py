@@ -0,0 +1,29 @@
+import os
+import anyio
+from fastapi.responses import FileResponse
+
+# ASGI extension servers advertise when they can sendfile() a body themselves
+ZEROCOPY_EXTENSION = "http.response.zerocopysend"
+# Chunk size for servers without it (Starlette's default is 64 KiB)
+SEND_CHUNK_SIZE = 1 << 20  # 1 MiB
+
+class SendfileResponse(FileResponse):
+    """
+    FileResponse that hands the file descriptor to the server when it supports
+    zero-copy send, so the body goes out via sendfile() without passing
+    through Python. Otherwise the file is streamed in 1 MiB chunks.
+    """
+    chunk_size = SEND_CHUNK_SIZE
+
+    async def __call__(self, scope, receive, send):
+        if ZEROCOPY_EXTENSION not in scope.get("extensions", {}) or scope["method"].upper() == "HEAD":
+            await super().__call__(scope, receive, send)
+            return
+
+        if self.stat_result is None:
+            self.set_stat_headers(await anyio.to_thread.run_sync(os.stat, self.path))
+        await send({"type": "http.response.start", "status": self.status_code, "headers": self.raw_headers})
+        with open(self.path, "rb") as file:
+            await send({"type": ZEROCOPY_EXTENSION, "file": file, "more_body": False})
+        if self.background is not None:
+            await self.background()